@@ -1,14 +1,43 @@
 import os
 import asyncio
-import json
+import hashlib
+import functools
+import gzip
+import itertools
+import mimetypes
+from contextlib import aclosing
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
+import orjson
 from quart import Quart, request, jsonify, Response, send_from_directory
+from quart.json.provider import JSONProvider
+from core.domain import is_valid_domain
 from core.schema import CertExpirationResult
-from core.expiration import get_cert_expiration_no_raise, get_cert_expiration_many
+from core.expiration import (
+    get_cert_expiration_no_raise,
+    get_cert_expiration_many,
+    start_cert_expiration_checks,
+)
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider that serializes with orjson (always compact)."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
 
 app = Quart(__name__)
-app.json.compact = True
+app.json = OrjsonProvider(app)
 
 
 @app.after_request
@@ -32,10 +61,18 @@ if Path("/app/static").exists():
 else:
     STATIC_DIR = Path(__file__).parent.parent / "frontend" / "out"
 
+# Upper bound on simultaneous TLS handshakes made for a single request
+MAX_CONCURRENT_CHECKS = int(os.environ.get("MAX_CONCURRENT_CHECKS", 50))
+
+# Accept header media types that request newline-delimited JSON streaming
+_STREAMING_MIME_TYPES = frozenset(
+    {"application/x-ndjson", "application/jsonl", "application/x-jsonlines"}
+)
+
 
-def format_json(data):
+def format_json(data) -> bytes:
     """Format JSON data compactly without pretty printing."""
-    return json.dumps(data, separators=(",", ":"))
+    return orjson.dumps(data)
 
 
 def _result_to_dict(result: CertExpirationResult) -> dict:
@@ -44,7 +81,7 @@ def _result_to_dict(result: CertExpirationResult) -> dict:
 
     if result.data:
         result_dict["data"] = {
-            "expiry_date": result.data.expiry_date.isoformat(),
+            "expiry_date": result.data.expiry_date_iso,
             "time_remaining_str": result.data.time_remaining_str,
             "is_expired": result.data.is_expired,
             "days_remaining": result.data.days_remaining,
@@ -53,26 +90,92 @@ def _result_to_dict(result: CertExpirationResult) -> dict:
     return result_dict
 
 
+# NDJSON lines arriving this close together (seconds) are flushed as one chunk
+_STREAM_FLUSH_DELAY = 0.005
+_STREAM_FLUSH_BYTES = 16 * 1024
+
+# Pre-serialized layout of _result_to_dict for the common success case
+_OK_RESULT_JSON = (
+    b'{"domain":%b,"data":{"expiry_date":%b,"time_remaining_str":%b,'
+    b'"is_expired":%b,"days_remaining":%d},"error":null}'
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _encode_result(result: CertExpirationResult) -> bytes:
+    """Serialize a result to JSON; equal (e.g. cached) results reuse the bytes."""
+    data = result.data
+    if data and not result.error:
+        return _OK_RESULT_JSON % (
+            orjson.dumps(result.domain),
+            orjson.dumps(data.expiry_date_iso),
+            orjson.dumps(data.time_remaining_str),
+            b"true" if data.is_expired else b"false",
+            data.days_remaining,
+        )
+    return format_json(_result_to_dict(result))
+
+
 def _validate_domain(domain: str) -> tuple[bool, str]:
-    """Validate a domain name. Returns (is_valid, error_message)."""
-    domain = domain.strip().lower()
-    if not domain or "." not in domain:
+    """Validate a stripped, lowercased domain name. Returns (is_valid, error_message)."""
+    if not is_valid_domain(domain):
         return False, f"Invalid domain name: {domain}"
     return True, ""
 
 
 async def _stream_results(domains: list[str]):
-    """Stream results as they come using get_cert_expiration_many."""
-    async for result in get_cert_expiration_many(domains):
-        result_dict = _result_to_dict(result)
-        yield format_json(result_dict) + "\n"
-
-
-async def _get_all_results(domains: list[str]) -> list[dict]:
-    """Get all results and return as a list in the same order as input domains."""
-    tasks = [get_cert_expiration_no_raise(domain) for domain in domains]
-    results = await asyncio.gather(*tasks)
-    return [_result_to_dict(result) for result in results]
+    """Stream results as they come using get_cert_expiration_many.
+
+    Lines that arrive within _STREAM_FLUSH_DELAY of each other are sent as
+    one chunk, up to _STREAM_FLUSH_BYTES.
+    """
+    lines: asyncio.Queue[bytes | None] = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async with aclosing(
+                get_cert_expiration_many(domains, MAX_CONCURRENT_CHECKS)
+            ) as results:
+                async for result in results:
+                    lines.put_nowait(_encode_result(result) + b"\n")
+        finally:
+            lines.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        finished = False
+        while not finished:
+            line = await lines.get()
+            if line is None:
+                break
+            buffer = bytearray(line)
+            while len(buffer) < _STREAM_FLUSH_BYTES:
+                try:
+                    line = await asyncio.wait_for(lines.get(), _STREAM_FLUSH_DELAY)
+                except TimeoutError:
+                    break
+                if line is None:
+                    finished = True
+                    break
+                buffer += line
+            yield bytes(buffer)
+        await producer
+    finally:
+        producer.cancel()
+
+
+async def _stream_json_array(domains: list[str]):
+    """Stream results as a JSON array in the same order as input domains."""
+    tasks = start_cert_expiration_checks(domains, MAX_CONCURRENT_CHECKS)
+    try:
+        yield b"["
+        for i, task in enumerate(tasks):
+            yield (b"," if i else b"") + _encode_result(await task)
+        yield b"]"
+    finally:
+        # The client may disconnect before the array is complete
+        for task in tasks:
+            task.cancel()
 
 
 @app.route("/api/")
@@ -81,7 +184,33 @@ async def get_cert_status():
     domain = request.args.get("domain")
     domains_param = request.args.get("domains")
 
-    if not domain and not domains_param:
+    # Fast path for the most common request shape, a lone ?domain=
+    if domain and not domains_param:
+        d = domain.strip().lower()
+        if d:
+            is_valid, error_msg = _validate_domain(d)
+            if not is_valid:
+                return jsonify({"error": error_msg, "domain": d, "data": None}), 400
+            result = await get_cert_expiration_no_raise(d)
+            return Response(_encode_result(result), mimetype="application/json")
+
+    # Strip, lowercase, dedupe and validate in a single pass; the dict keeps
+    # first-seen order, so it serves as both the seen-set and the result
+    unique_domains: dict[str, None] = {}
+    raw_domains = itertools.chain(
+        [domain] if domain else [], domains_param.split(",") if domains_param else []
+    )
+    for raw in raw_domains:
+        d = raw.strip().lower()
+        if not d or d in unique_domains:
+            continue
+        is_valid, error_msg = _validate_domain(d)
+        if not is_valid:
+            return jsonify({"error": error_msg, "domain": d, "data": None}), 400
+        unique_domains[d] = None
+    domains = list(unique_domains)
+
+    if not domains:
         return (
             jsonify(
                 {
@@ -93,54 +222,19 @@ async def get_cert_status():
             400,
         )
 
-    domains = []
-    if domain:
-        domains.append(domain)
-    if domains_param:
-        domains.extend([d.strip() for d in domains_param.split(",") if d.strip()])
-
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_domains = []
-    for d in domains:
-        if d not in seen:
-            seen.add(d)
-            unique_domains.append(d)
-    domains = unique_domains
-
-    for domain in domains:
-        is_valid, error_msg = _validate_domain(domain)
-        if not is_valid:
-            return jsonify({"error": error_msg, "domain": domain, "data": None}), 400
-
-    accept_header = request.headers.get("Accept", "")
-    streaming_mime_types = [
-        "application/x-ndjson",
-        "application/jsonl",
-        "application/x-jsonlines",
-    ]
-    should_stream = any(
-        mime_type in accept_header for mime_type in streaming_mime_types
-    )
+    accept_header = request.headers.get("Accept", "").lower()
+    accepted = {m.split(";", 1)[0].strip() for m in accept_header.split(",")}
+    should_stream = not accepted.isdisjoint(_STREAMING_MIME_TYPES)
 
     if len(domains) == 1 or not should_stream:
-        if len(domains) == 1 and domain and not domains_param:
-            result = await get_cert_expiration_no_raise(domains[0])
-            return jsonify(_result_to_dict(result))
-        else:
-            results = await _get_all_results(domains)
-            return jsonify(results)
+        return Response(_stream_json_array(domains), mimetype="application/json")
     else:
 
         async def generate():
             async for result_json in _stream_results(domains):
                 yield result_json
 
-        return Response(
-            generate(),
-            mimetype="application/x-ndjson",
-            headers={"Transfer-Encoding": "chunked"},
-        )
+        return Response(generate(), mimetype="application/x-ndjson")
 
 
 @app.route("/api/status")
@@ -149,11 +243,103 @@ async def status():
     return jsonify({"status": "operational", "message": "Service is running correctly"})
 
 
+def _list_static_files(static_dir: Path) -> frozenset[str]:
+    """List files under static_dir as URL-style relative paths."""
+    if not static_dir.is_dir():
+        return frozenset()
+    return frozenset(
+        p.relative_to(static_dir).as_posix() for p in static_dir.rglob("*") if p.is_file()
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class _StaticFile:
+    body: bytes
+    gzip_body: Optional[bytes]
+    mimetype: str
+    etag: str
+
+
+# The Next.js export is small and fixed for the life of the process, so the
+# file list is taken once and contents are cached in memory at startup.
+# Only listed paths are served, which also rules out path traversal.
+_STATIC_FILES = _list_static_files(STATIC_DIR)
+_STATIC_CACHE: dict[str, _StaticFile] = {}
+# Larger files are sent from disk instead of being held in memory
+_STATIC_CACHE_MAX_BYTES = 1024 * 1024
+# Text types that get a gzip copy, compressed once when cached
+_GZIP_MIMETYPES = frozenset(
+    {
+        "text/html",
+        "text/css",
+        "text/javascript",
+        "text/plain",
+        "application/javascript",
+        "application/json",
+        "image/svg+xml",
+    }
+)
+
+
+def _load_static(path: str) -> Optional[_StaticFile]:
+    """Return the cache entry for a listed static file, or None if it is too large."""
+    entry = _STATIC_CACHE.get(path)
+    if entry is None:
+        file_path = os.path.join(STATIC_DIR, path)
+        if os.path.getsize(file_path) > _STATIC_CACHE_MAX_BYTES:
+            return None
+        with open(file_path, "rb") as f:
+            body = f.read()
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        gzip_body = None
+        if mimetype in _GZIP_MIMETYPES:
+            gzip_body = gzip.compress(body, mtime=0)
+            if len(gzip_body) >= len(body):
+                gzip_body = None
+        entry = _StaticFile(body, gzip_body, mimetype, hashlib.sha1(body).hexdigest())
+        _STATIC_CACHE[path] = entry
+    return entry
+
+
+@app.before_serving
+async def _preload_static() -> None:
+    """Read the frontend into memory before the first request."""
+    for path in _STATIC_FILES:
+        _load_static(path)
+
+
+def _static_response(entry: _StaticFile) -> Response:
+    """Build a response for a cached static file, honoring If-None-Match."""
+    use_gzip = entry.gzip_body is not None and request.accept_encodings["gzip"] > 0
+    etag = f"{entry.etag}-gzip" if use_gzip else entry.etag
+    # HTML pages must revalidate so a new frontend build is picked up
+    cache_control = (
+        "no-cache" if entry.mimetype == "text/html" else "public, max-age=3600"
+    )
+    headers = {"ETag": f'"{etag}"', "Cache-Control": cache_control}
+    if entry.gzip_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+
+    if request.if_none_match.contains(etag):
+        return Response(b"", status=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(entry.gzip_body, mimetype=entry.mimetype, headers=headers)
+    return Response(entry.body, mimetype=entry.mimetype, headers=headers)
+
+
+async def _serve_static_file(path: str):
+    entry = _load_static(path)
+    if entry is None:
+        return await send_from_directory(STATIC_DIR, path)
+    return _static_response(entry)
+
+
 @app.route("/")
 async def serve_index():
     """Serve the index.html file."""
-    if (STATIC_DIR / "index.html").exists():
-        return await send_from_directory(STATIC_DIR, "index.html")
+    if "index.html" in _STATIC_FILES:
+        return await _serve_static_file("index.html")
     return jsonify({"error": "Frontend not built"}), 404
 
 
@@ -163,16 +349,27 @@ async def serve_static(path):
     if path.startswith("api/"):
         return jsonify({"error": "Not found"}), 404
 
-    file_path = STATIC_DIR / path
-    if file_path.is_file() and file_path.exists():
-        return await send_from_directory(STATIC_DIR, path)
+    if path in _STATIC_FILES:
+        return await _serve_static_file(path)
 
-    if (STATIC_DIR / "index.html").exists():
-        return await send_from_directory(STATIC_DIR, "index.html")
+    if "index.html" in _STATIC_FILES:
+        return await _serve_static_file("index.html")
 
     return jsonify({"error": "Not found"}), 404
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     port = int(os.environ.get("PORT", 3000))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    # Each worker is a separate process with its own certificate and static caches
+    workers = int(os.environ.get("WORKERS", 1))
+    # "auto" picks uvloop and httptools when installed (not available on Windows)
+    uvicorn.run(
+        "app:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        loop="auto",
+        http="auto",
+    )
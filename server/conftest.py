@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Tests import the CLI modules from core/ the way the scripts see each other
+_CORE_DIR = str(Path(__file__).resolve().parent / "core")
+if _CORE_DIR not in sys.path:
+    sys.path.insert(0, _CORE_DIR)
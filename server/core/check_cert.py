@@ -14,7 +14,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 import asyncio
-import argparse
+from core.domain import normalize_domain
 from core.expiration import get_cert_expiration_many
 
 
@@ -26,27 +26,34 @@ def eprint(*args, **kwargs):
 async def check_domains(domains: list[str]) -> None:
     """Check domains and print results to console."""
     async for result in get_cert_expiration_many(domains):
-        print(result.domain)
+        # Build each block and write it in one call rather than print per line
+        lines = [result.domain]
         if result.error:
-            print(f"ERROR: {result.error}")
+            lines.append(f"ERROR: {result.error}")
         elif result.data is None:
-            print("ERROR: No data returned")
+            lines.append("ERROR: No data returned")
         else:
             data = result.data
-            print(f"Certificate expires: {data.expiry_date.strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            print(f"Time Remaining: {data.time_remaining_str}")
+            lines.append(
+                f"Certificate expires: {data.expiry_date.strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            )
+            lines.append(f"Time Remaining: {data.time_remaining_str}")
 
             if data.is_expired:
-                print("STATUS: EXPIRED")
+                lines.append("STATUS: EXPIRED")
             elif data.days_remaining < 30:
-                print("STATUS: EXPIRING SOON (less than 30 days)")
+                lines.append("STATUS: EXPIRING SOON (less than 30 days)")
             else:
-                print("STATUS: VALID")
-        print("")
+                lines.append("STATUS: VALID")
+        lines.append("")
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main() -> None:
     """Main function to handle command line arguments and run the check."""
+    # Only the command line needs argparse, not importers of this module
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Check SSL certificate expiration for multiple domains concurrently",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -75,13 +82,11 @@ Examples:
 
     args = parser.parse_args()
 
-    domains = []
-    for domain in args.domains:
-        domain = domain.strip().lower()
-        if not domain or "." not in domain:
-            eprint(f"Error: Invalid domain name '{domain}'")
-            sys.exit(400)
-        domains.append(domain)
+    try:
+        domains = [normalize_domain(domain) for domain in args.domains]
+    except ValueError as e:
+        eprint(f"Error: {e}")
+        sys.exit(400)
 
     try:
         asyncio.run(check_domains(domains))
@@ -94,5 +99,11 @@ Examples:
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        # Faster event loop for large batches; optional, core needs only the stdlib
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     main()
-
@@ -15,12 +15,13 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 import asyncio
-import argparse
 import subprocess
 import configparser
+import functools
 import os
-from typing import List, Optional
-from core.expiration import get_cert_expiration_many
+from typing import List, Optional, Tuple
+from core.domain import normalize_domain
+from core.expiration import get_cert_expiration_all
 from core.schema import CertExpirationResult
 
 
@@ -33,14 +34,14 @@ async def check_domains_and_send_alerts(
     domains: list[str],
     sender_email: str,
     recipient_email: str,
-    warning_days: List[int],
+    warning_days: Tuple[int, ...],
     dry_run: bool = False,
     force: bool = False,
 ) -> None:
     """Check domains and send email alerts for expiring certificates."""
     results_to_alert: List[CertExpirationResult] = []
 
-    async for result in get_cert_expiration_many(domains):
+    for result in await get_cert_expiration_all(domains):
         if result.error:
             continue
 
@@ -159,14 +160,15 @@ Content-Type: text/plain; charset=utf-8
         raise
 
 
-def parse_warning_days(warning_days_str: Optional[str]) -> List[int]:
-    """Parse comma-separated warning days string into a list of integers."""
+@functools.lru_cache(maxsize=16)
+def parse_warning_days(warning_days_str: Optional[str]) -> Tuple[int, ...]:
+    """Parse comma-separated warning days string into a tuple of integers."""
     if not warning_days_str:
-        return [14, 7, 3, 0]
+        return (14, 7, 3, 0)
 
     try:
         days = [int(day.strip()) for day in warning_days_str.split(",")]
-        return sorted(days, reverse=True)
+        return tuple(sorted(days, reverse=True))
     except ValueError as e:
         raise ValueError(f"Invalid warning days format '{warning_days_str}': {e}")
 
@@ -178,7 +180,7 @@ def parse_domains(domains_str: Optional[str]) -> List[str]:
     return [d.strip().lower() for d in domains_str.split(",") if d.strip()]
 
 
-def load_config(config_path: str) -> tuple[str, str, List[int], List[str]]:
+def load_config(config_path: str) -> tuple[str, str, Tuple[int, ...], List[str]]:
     """Load email configuration from an INI file."""
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Config file not found: {config_path}")
@@ -208,6 +210,9 @@ def load_config(config_path: str) -> tuple[str, str, List[int], List[str]]:
 
 def main() -> None:
     """Main function to handle command line arguments and run the email alert check."""
+    # Only the command line needs argparse, not importers of this module
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Check SSL certificate expiration and send email alerts",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -279,13 +284,11 @@ Examples:
         eprint("Error: No domains specified (provide via command line or config file)")
         sys.exit(400)
 
-    domains = []
-    for domain in raw_domains:
-        domain = domain.strip().lower()
-        if not domain or "." not in domain:
-            eprint(f"Error: Invalid domain name '{domain}'")
-            sys.exit(400)
-        domains.append(domain)
+    try:
+        domains = [normalize_domain(domain) for domain in raw_domains]
+    except ValueError as e:
+        eprint(f"Error: {e}")
+        sys.exit(400)
 
     try:
         asyncio.run(
@@ -302,4 +305,11 @@ Examples:
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        # Faster event loop for large batches; optional, core needs only the stdlib
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     main()
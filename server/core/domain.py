@@ -0,0 +1,19 @@
+import re
+
+# One or more dot-separated labels of letters, digits and inner hyphens
+DOMAIN_RE = re.compile(
+    r"^[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?)+$"
+)
+
+
+def is_valid_domain(domain: str) -> bool:
+    """Check a stripped, lowercased domain name."""
+    return DOMAIN_RE.match(domain) is not None
+
+
+def normalize_domain(domain: str) -> str:
+    """Strip and lowercase a domain name, raising ValueError if it is invalid."""
+    normalized = domain.strip().lower()
+    if not is_valid_domain(normalized):
+        raise ValueError(f"Invalid domain name '{normalized}'")
+    return normalized
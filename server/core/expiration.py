@@ -1,19 +1,56 @@
+import os
 import ssl
+import time
+import socket
 import datetime
 import asyncio
-from typing import AsyncIterator, Sequence
+import functools
+from contextlib import nullcontext
+from typing import Any, AsyncGenerator, Optional, Sequence
 from .schema import CertExpirationData, CertExpirationResult
 
+# Building a context loads the CA store, which is expensive; share one for all checks
+_SSL_CONTEXT = ssl.create_default_context()
 
+# Resolved addresses per host: domain -> (expires_at monotonic time, addresses)
+_DNS_CACHE: dict[str, tuple[float, list[str]]] = {}
+_DNS_TTL_SECONDS = 300
+
+# Certificate expiry times per host: domain -> (expires_at monotonic time, expiry)
+_EXPIRY_CACHE: dict[str, tuple[float, datetime.datetime]] = {}
+_EXPIRY_TTL_SECONDS = float(os.environ.get("CERT_CACHE_TTL", 3600))
+_EXPIRY_MIN_TTL_SECONDS = 60
+
+# Expiry lookups in progress, shared by concurrent callers for the same domain
+_INFLIGHT: dict[str, "asyncio.Task[datetime.datetime]"] = {}
+
+# Process-wide cap on open connections: (loop it was created for, semaphore)
+_MAX_CONNECTIONS = int(os.environ.get("CERT_MAX_CONNECTIONS", 256))
+_CONNECTION_LIMIT: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+# Overall limit for one domain check, including DNS, connect and handshake
+DEFAULT_TIMEOUT_SECONDS = 15.0
+
+# Per address, so an unreachable one does not hold up trying the next
+_CONNECT_TIMEOUT_SECONDS = 5
+_HANDSHAKE_TIMEOUT_SECONDS = 10
+
+_MAX_CACHE_ENTRIES = 1024
+
+# DER tags found on the way to the certificate's notAfter field
+_DER_EXPLICIT_VERSION = 0xA0
+_DER_UTC_TIME = 0x17
+_DER_GENERALIZED_TIME = 0x18
+
+
+@functools.lru_cache(maxsize=4096)
 def _format_time_remaining(days_remaining: int) -> str:
     """Format the remaining time in a human-readable format."""
     if days_remaining < 0:
         return "EXPIRED"
 
-    years = days_remaining // 365
-    remaining_days = days_remaining % 365
-    months = remaining_days // 30
-    days = remaining_days % 30
+    years, remaining_days = divmod(days_remaining, 365)
+    months, days = divmod(remaining_days, 30)
 
     parts = []
     if years > 0:
@@ -26,6 +63,71 @@ def _format_time_remaining(days_remaining: int) -> str:
     return ", ".join(parts)
 
 
+def _der_element(der: bytes, offset: int) -> tuple[int, int, int]:
+    """Read the DER element header at offset. Returns (tag, content start, content end)."""
+    if offset + 2 > len(der):
+        raise ValueError("Truncated certificate")
+    tag = der[offset]
+    length = der[offset + 1]
+    offset += 2
+    if length & 0x80:
+        num_bytes = length & 0x7F
+        length = int.from_bytes(der[offset : offset + num_bytes], "big")
+        offset += num_bytes
+    if offset + length > len(der):
+        raise ValueError("Truncated certificate")
+    return tag, offset, offset + length
+
+
+def _parse_not_after(der: bytes) -> datetime.datetime:
+    """Read notAfter from a DER certificate without decoding the rest of it."""
+    _, tbs_start, _ = _der_element(der, 0)  # Certificate
+    _, offset, _ = _der_element(der, tbs_start)  # TBSCertificate
+    tag, _, end = _der_element(der, offset)
+    if tag == _DER_EXPLICIT_VERSION:
+        offset = end
+    for _ in range(3):  # serialNumber, signature, issuer
+        _, _, offset = _der_element(der, offset)
+    _, validity_start, _ = _der_element(der, offset)
+    _, _, offset = _der_element(der, validity_start)  # notBefore
+    tag, start, end = _der_element(der, offset)
+    value = der[start:end].decode("ascii")
+
+    if tag == _DER_UTC_TIME:  # YYMMDDHHMMSSZ
+        year = int(value[:2])
+        year += 1900 if year >= 50 else 2000
+        value = value[2:]
+    elif tag == _DER_GENERALIZED_TIME:  # YYYYMMDDHHMMSSZ
+        year = int(value[:4])
+        value = value[4:]
+    else:
+        raise ValueError(f"Unexpected certificate time tag: {tag:#x}")
+    if len(value) != 11 or not value.endswith("Z"):
+        raise ValueError(f"Unexpected certificate time: {value!r}")
+    return datetime.datetime(
+        year,
+        int(value[0:2]),
+        int(value[2:4]),
+        int(value[4:6]),
+        int(value[6:8]),
+        int(value[8:10]),
+        tzinfo=datetime.timezone.utc,
+    )
+
+
+def _cache_put(
+    cache: dict[str, tuple[float, Any]], key: str, value: Any, ttl: float
+) -> None:
+    """Store value with a TTL, evicting expired (then oldest) entries when full."""
+    now = time.monotonic()
+    if len(cache) >= _MAX_CACHE_ENTRIES:
+        for expired in [k for k, (expires_at, _) in cache.items() if expires_at <= now]:
+            del cache[expired]
+        while len(cache) >= _MAX_CACHE_ENTRIES:
+            del cache[next(iter(cache))]
+    cache[key] = (now + ttl, value)
+
+
 async def _safe_close_writer(writer: asyncio.StreamWriter) -> None:
     try:
         writer.close()
@@ -34,51 +136,215 @@ async def _safe_close_writer(writer: asyncio.StreamWriter) -> None:
         pass
 
 
+async def _resolve(domain: str) -> list[str]:
+    """Resolve domain to its IP addresses, reusing recent lookups."""
+    now = time.monotonic()
+    cached = _DNS_CACHE.get(domain)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(domain, 443, type=socket.SOCK_STREAM)
+    addresses = list(dict.fromkeys(str(info[4][0]) for info in infos))
+    _cache_put(_DNS_CACHE, domain, addresses, _DNS_TTL_SECONDS)
+    return addresses
+
+
+async def _open_connection(domain: str) -> asyncio.StreamWriter:
+    """Open a TCP connection to domain, trying each resolved address in turn.
+
+    TLS is started on the connection afterwards, so a TLS failure is never
+    retried against another address; it would present the same certificate.
+    """
+    last_error: OSError = OSError(f"No addresses found for {domain}")
+    for address in await _resolve(domain):
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(address, 443), _CONNECT_TIMEOUT_SECONDS
+            )
+            return writer
+        except TimeoutError:
+            last_error = TimeoutError(f"Connection to {address} timed out")
+        except OSError as e:
+            last_error = e
+    # The host may have moved; look it up afresh next time
+    _DNS_CACHE.pop(domain, None)
+    raise last_error
+
+
+def _connection_limit() -> asyncio.Semaphore:
+    """Get the connection semaphore, creating it for the running loop."""
+    global _CONNECTION_LIMIT
+    loop = asyncio.get_running_loop()
+    if _CONNECTION_LIMIT is None or _CONNECTION_LIMIT[0] is not loop:
+        _CONNECTION_LIMIT = (loop, asyncio.Semaphore(_MAX_CONNECTIONS))
+    return _CONNECTION_LIMIT[1]
+
+
 async def _get_certificate_expiration_time(domain: str) -> datetime.datetime:
     """Get SSL certificate expiration date for a domain."""
-    context = ssl.create_default_context()
-    _, writer = await asyncio.open_connection(
-        domain, 443, ssl=context, server_hostname=domain
-    )
+    async with _connection_limit():
+        writer = await _open_connection(domain)
+        try:
+            try:
+                await asyncio.wait_for(
+                    writer.start_tls(_SSL_CONTEXT, server_hostname=domain),
+                    _HANDSHAKE_TIMEOUT_SECONDS,
+                )
+            except TimeoutError:
+                raise TimeoutError("TLS handshake timed out") from None
+            ssl_object = writer.get_extra_info("ssl_object")
+            der = ssl_object.getpeercert(binary_form=True)
+        finally:
+            # Start closing under the limit, but wait for it outside
+            writer.close()
+    await _safe_close_writer(writer)
 
-    try:
-        ssl_socket = writer.get_extra_info("ssl_object")
-        cert = ssl_socket.getpeercert()
-        not_after = cert["notAfter"].replace("GMT", "+0000")
-        exp_date = datetime.datetime.strptime(not_after, "%b %d %H:%M:%S %Y %z")
-        return exp_date
-    finally:
-        await _safe_close_writer(writer)
+    if not der:
+        raise ssl.SSLError("Server sent no certificate")
+    return _parse_not_after(der)
 
 
-async def get_cert_expiration_data(domain: str) -> CertExpirationData:
-    """Get SSL certificate expiration information for a single domain."""
-    expiry_time = await _get_certificate_expiration_time(domain)
+def _expiry_ttl(expiry_time: datetime.datetime) -> float:
+    """Cache for a tenth of the remaining lifetime, clamped to [60s, CERT_CACHE_TTL].
+
+    Each re-check after the entry expires does a full handshake, so a renewal
+    is reported at most one TTL after it is deployed.
+    """
     now = datetime.datetime.now(datetime.timezone.utc)
+    remaining = (expiry_time - now).total_seconds()
+    return min(_EXPIRY_TTL_SECONDS, max(_EXPIRY_MIN_TTL_SECONDS, remaining / 10))
+
+
+async def _fetch_and_cache_expiration_time(domain: str) -> datetime.datetime:
+    expiry_time = await _get_certificate_expiration_time(domain)
+    if _EXPIRY_TTL_SECONDS > 0:
+        _cache_put(_EXPIRY_CACHE, domain, expiry_time, _expiry_ttl(expiry_time))
+    return expiry_time
+
+
+async def _get_cached_expiration_time(domain: str) -> datetime.datetime:
+    """Get the expiration date from cache, or from a single shared lookup."""
+    cached = _EXPIRY_CACHE.get(domain)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    task = _INFLIGHT.get(domain)
+    if task is None:
+        task = asyncio.create_task(_fetch_and_cache_expiration_time(domain))
+        _INFLIGHT[domain] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(domain, None))
+    # A cancelled caller must not cancel the lookup other callers are awaiting
+    return await asyncio.shield(task)
+
+
+async def get_cert_expiration_data(
+    domain: str, now: Optional[datetime.datetime] = None
+) -> CertExpirationData:
+    """Get SSL certificate expiration information for a single domain.
+
+    Remaining time is measured from now (default: the current time).
+    Expiration dates are cached for up to CERT_CACHE_TTL seconds (default 3600,
+    0 disables), and for less as the certificate nears expiry.
+    """
+    expiry_time = await _get_cached_expiration_time(domain)
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
     days_remaining = (expiry_time - now).days
     is_expired = days_remaining < 0
     time_remaining_str = _format_time_remaining(days_remaining)
     return CertExpirationData(expiry_time, time_remaining_str, is_expired, days_remaining)
 
 
-async def get_cert_expiration_no_raise(domain: str) -> CertExpirationResult:
-    """Get SSL certificate expiration information without raising exceptions."""
+async def get_cert_expiration_no_raise(
+    domain: str,
+    timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+    now: Optional[datetime.datetime] = None,
+) -> CertExpirationResult:
+    """Get SSL certificate expiration information without raising exceptions.
+
+    A check taking longer than timeout seconds (None for no limit) fails.
+    The timeout includes any wait for one of the CERT_MAX_CONNECTIONS
+    connection slots shared by the whole process.
+    """
+    deadline = asyncio.timeout(timeout)
     try:
-        data = await get_cert_expiration_data(domain)
+        async with deadline:
+            data = await get_cert_expiration_data(domain, now)
         return CertExpirationResult(domain=domain, data=data, error=None)
     except Exception as e:
-        return CertExpirationResult(domain=domain, data=None, error=str(e))
+        # Connect and handshake timeouts from inside keep their own message
+        if deadline.expired() and timeout is not None:
+            error = f"Check timed out after {timeout:g} seconds"
+        else:
+            error = str(e)
+        return CertExpirationResult(domain=domain, data=None, error=error)
+
+
+def start_cert_expiration_checks(
+    domains: Sequence[str],
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+) -> list[asyncio.Task[CertExpirationResult]]:
+    """Start a check task per domain, in the same order as domains.
+
+    At most max_concurrency checks run at once; by default there is no limit.
+    Each check is limited to timeout seconds, not counting time spent waiting
+    for one of those max_concurrency slots; waiting for a process-wide
+    connection slot does count. The caller owns the tasks and must cancel
+    any it stops waiting for.
+    """
+    limit = asyncio.Semaphore(max_concurrency) if max_concurrency else nullcontext()
+
+    # Remaining days are counted from the same moment for the whole batch
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    async def check(domain: str) -> CertExpirationResult:
+        async with limit:
+            return await get_cert_expiration_no_raise(domain, timeout, now)
+
+    return [asyncio.create_task(check(domain)) for domain in domains]
 
 
 async def get_cert_expiration_many(
     domains: Sequence[str],
-) -> AsyncIterator[CertExpirationResult]:
-    """Check SSL certificate expiration for multiple domains asynchronously."""
-    tasks = [
-        asyncio.create_task(get_cert_expiration_no_raise(domain)) for domain in domains
-    ]
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+) -> AsyncGenerator[CertExpirationResult, None]:
+    """Check SSL certificate expiration for multiple domains asynchronously.
+
+    Results are yielded as checks finish; see start_cert_expiration_checks
+    for max_concurrency and timeout.
+    """
+    # Each task is handed over when it finishes, whatever the outcome, so a
+    # failed check reaches the consumer instead of leaving it waiting
+    done: asyncio.Queue[asyncio.Task[CertExpirationResult]] = asyncio.Queue()
+    tasks = start_cert_expiration_checks(domains, max_concurrency, timeout)
+    for task in tasks:
+        task.add_done_callback(done.put_nowait)
 
-    for task in asyncio.as_completed(tasks):
-        result = await task
-        yield result
+    try:
+        for _ in range(len(tasks)):
+            yield (await done.get()).result()
+    finally:
+        # The consumer may stop early (e.g. a client disconnecting mid-stream)
+        for task in tasks:
+            task.cancel()
 
+
+async def get_cert_expiration_all(
+    domains: Sequence[str],
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS,
+) -> list[CertExpirationResult]:
+    """Check SSL certificate expiration for multiple domains, returning all results.
+
+    Results are in the same order as domains. For callers that need every
+    result before acting; get_cert_expiration_many yields them as they finish.
+    """
+    tasks = start_cert_expiration_checks(domains, max_concurrency, timeout)
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,19 +1,23 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 import datetime
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CertExpirationData:
     expiry_date: datetime.datetime
     time_remaining_str: str
     is_expired: bool
     days_remaining: int
+    expiry_date_iso: str = field(init=False, repr=False, compare=False)
 
+    def __post_init__(self) -> None:
+        # Formatted once here so serializers don't call isoformat() per response
+        object.__setattr__(self, "expiry_date_iso", self.expiry_date.isoformat())
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class CertExpirationResult:
     domain: str
     data: Optional[CertExpirationData]
     error: Optional[str]
-
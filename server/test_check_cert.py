@@ -2,119 +2,177 @@
 """
 Unit tests for check_cert.py script using pytest.
 Run from server/ directory: pytest test_check_cert.py
+(add -n auto to spread the tests over all cores; requires pytest-xdist)
 """
 
-import sys
-import os
 import datetime
-import io
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
-from contextlib import redirect_stdout
+from dataclasses import replace
 
 import pytest
 
-# Add core directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "core"))
-
+import check_cert
 from check_cert import check_domains, main
 from schema import CertExpirationResult, CertExpirationData
 
 
-async def create_async_iter(results):
-    for result in results:
-        yield result
+class _AsyncList:
+    """Async iterator over a list, standing in for get_cert_expiration_many."""
 
+    __slots__ = ("_it",)
 
-class TestCheckDomains:
-    @pytest.fixture
-    def valid_cert_data(self):
-        return CertExpirationData(
-            expiry_date=datetime.datetime(
-                2024, 12, 31, 23, 59, 59, tzinfo=datetime.timezone.utc
-            ),
-            time_remaining_str="2 months, 15 days",
-            is_expired=False,
-            days_remaining=75,
-        )
+    def __init__(self, items):
+        self._it = iter(items)
 
-    @pytest.fixture
-    def expired_cert_data(self):
-        return CertExpirationData(
-            expiry_date=datetime.datetime(
-                2023, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc
-            ),
-            time_remaining_str="EXPIRED",
-            is_expired=True,
-            days_remaining=-10,
-        )
+    def __aiter__(self):
+        return self
 
-    @pytest.mark.asyncio
-    @patch("check_cert.get_cert_expiration_many")
-    async def test_single_domain_success(
-        self, mock_get_cert_expiration_many, valid_cert_data
-    ):
-        mock_result = CertExpirationResult(
-            domain="example.com", data=valid_cert_data, error=None
-        )
-        mock_get_cert_expiration_many.return_value = create_async_iter([mock_result])
-
-        with redirect_stdout(io.StringIO()) as stdout:
-            await check_domains(["example.com"])
-            output = stdout.getvalue()
-
-        assert "example.com" in output
-        assert "STATUS: VALID" in output
-
-    @pytest.mark.asyncio
-    @patch("check_cert.get_cert_expiration_many")
-    async def test_expired_certificate(
-        self, mock_get_cert_expiration_many, expired_cert_data
-    ):
-        mock_result = CertExpirationResult(
-            domain="expired.com", data=expired_cert_data, error=None
-        )
-        mock_get_cert_expiration_many.return_value = create_async_iter([mock_result])
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+def create_async_iter(results):
+    return _AsyncList(results)
+
+
+def _assert_lines_in(output, lines):
+    """Assert that each of lines is a whole line of output, reporting all missing."""
+    output_lines = set(output.splitlines())
+    missing = [line for line in lines if line not in output_lines]
+    assert not missing, missing
 
-        with redirect_stdout(io.StringIO()) as stdout:
-            await check_domains(["expired.com"])
-            output = stdout.getvalue()
 
-        assert "STATUS: EXPIRED" in output
+def _blocks_by_domain(output):
+    """Split check_domains output into its per-result blocks, keyed by domain."""
+    blocks = output.strip().split("\n\n")
+    return {block.splitlines()[0]: block for block in blocks}
 
-    @pytest.mark.asyncio
-    @patch("check_cert.get_cert_expiration_many")
-    async def test_error_handling(self, mock_get_cert_expiration_many):
-        mock_result = CertExpirationResult(
-            domain="bad.com", data=None, error="Connection failed"
+
+# Shared read-only test data; the schema classes are frozen
+_VALID = CertExpirationData(
+    expiry_date=datetime.datetime(2024, 12, 31, 23, 59, 59, tzinfo=datetime.timezone.utc),
+    time_remaining_str="2 months, 15 days",
+    is_expired=False,
+    days_remaining=75,
+)
+_EXPIRED = CertExpirationData(
+    expiry_date=datetime.datetime(2023, 1, 1, 0, 0, 0, tzinfo=datetime.timezone.utc),
+    time_remaining_str="EXPIRED",
+    is_expired=True,
+    days_remaining=-10,
+)
+_RESULT_VALID = CertExpirationResult(domain="example.com", data=_VALID, error=None)
+_RESULT_EXPIRED = CertExpirationResult(domain="expired.com", data=_EXPIRED, error=None)
+_RESULT_ERROR = CertExpirationResult(domain="bad.com", data=None, error="Connection failed")
+
+# check_domains output for _RESULT_VALID
+_EXPECTED_SINGLE = (
+    "example.com\n"
+    "Certificate expires: 2024-12-31 23:59:59 UTC\n"
+    "Time Remaining: 2 months, 15 days\n"
+    "STATUS: VALID\n"
+    "\n"
+)
+
+
+class TestCheckDomains:
+    @pytest.fixture(autouse=True)
+    def _patched(self, monkeypatch):
+        # One fresh mock per test; tests set what it returns
+        self._mock = MagicMock()
+        monkeypatch.setattr(check_cert, "get_cert_expiration_many", self._mock)
+
+    async def test_single_domain_success(self, capsys):
+        self._mock.return_value = create_async_iter([_RESULT_VALID])
+
+        await check_domains(["example.com"])
+        output = capsys.readouterr().out
+
+        assert output == _EXPECTED_SINGLE
+
+    async def test_expired_certificate(self, capsys):
+        self._mock.return_value = create_async_iter([_RESULT_EXPIRED])
+
+        await check_domains(["expired.com"])
+        output = capsys.readouterr().out
+
+        _assert_lines_in(output, ["expired.com", "STATUS: EXPIRED"])
+
+    async def test_error_handling(self, capsys):
+        self._mock.return_value = create_async_iter([_RESULT_ERROR])
+
+        await check_domains(["bad.com"])
+        output = capsys.readouterr().out
+
+        _assert_lines_in(output, ["bad.com", "ERROR: Connection failed"])
+
+    async def test_status_and_error_table(self, capsys):
+        def with_days(days, is_expired=False):
+            return replace(_VALID, days_remaining=days, is_expired=is_expired)
+
+        soon = "STATUS: EXPIRING SOON (less than 30 days)"
+        cases = [
+            ("d30.com", with_days(30), None, "STATUS: VALID"),
+            ("d29.com", with_days(29), None, soon),
+            ("d0.com", with_days(0), None, soon),
+            ("past.com", with_days(-1, is_expired=True), None, "STATUS: EXPIRED"),
+            ("refused.com", None, "Connection refused", "ERROR: Connection refused"),
+            ("slow.com", None, "Check timed out", "ERROR: Check timed out"),
+            ("empty.com", None, None, "ERROR: No data returned"),
+        ]
+        self._mock.return_value = create_async_iter(
+            [
+                CertExpirationResult(domain=domain, data=data, error=error)
+                for domain, data, error, _ in cases
+            ]
         )
-        mock_get_cert_expiration_many.return_value = create_async_iter([mock_result])
 
-        with redirect_stdout(io.StringIO()) as stdout:
-            await check_domains(["bad.com"])
-            output = stdout.getvalue()
+        await check_domains([domain for domain, *_ in cases])
+        output = capsys.readouterr().out
 
-        assert "ERROR: Connection failed" in output
+        blocks = _blocks_by_domain(output)
+        for domain, _, _, expected in cases:
+            _assert_lines_in(blocks[domain], [expected])
 
 
 class TestMainFunction:
-    @patch("check_cert.asyncio.run")
-    @patch("check_cert.argparse.ArgumentParser.parse_args")
-    def test_main_success(self, mock_parse_args, mock_asyncio_run):
-        mock_args = MagicMock()
-        mock_args.domains = ["example.com"]
-        mock_parse_args.return_value = mock_args
+    @pytest.fixture
+    def exit_raiser(self, monkeypatch):
+        """Make sys.exit in check_cert raise SystemExit and record its codes."""
+        calls = []
 
-        main()
+        def fake_exit(code=0):
+            calls.append(code)
+            raise SystemExit(code)
 
-        mock_asyncio_run.assert_called_once()
+        monkeypatch.setattr(check_cert.sys, "exit", fake_exit)
+        return calls
 
-    @patch("check_cert.sys.exit")
-    @patch("check_cert.argparse.ArgumentParser.parse_args")
-    def test_main_invalid_domain(self, mock_parse_args, mock_sys_exit):
-        mock_args = MagicMock()
-        mock_args.domains = ["invalid"]
-        mock_parse_args.return_value = mock_args
+    @patch("check_cert.asyncio.run")
+    @patch("argparse.ArgumentParser.parse_args")
+    def test_main_success(self, mock_parse_args, mock_asyncio_run, exit_raiser):
+        mock_parse_args.return_value = SimpleNamespace(domains=["example.com"])
 
         main()
 
-        mock_sys_exit.assert_called_once_with(400)
+        mock_asyncio_run.assert_called_once()
+        # The patched run never awaits the check_domains coroutine it was given
+        mock_asyncio_run.call_args.args[0].close()
+        assert exit_raiser == []
+
+    @pytest.mark.parametrize(
+        "bad_domain", ["invalid", "", "   ", "...", "under_score.com", "-dash.com"]
+    )
+    @patch("argparse.ArgumentParser.parse_args")
+    def test_main_invalid_domain(self, mock_parse_args, bad_domain, exit_raiser):
+        domains = ["example.com", bad_domain]
+        mock_parse_args.return_value = SimpleNamespace(domains=domains)
+
+        with pytest.raises(SystemExit):
+            main()
+
+        assert exit_raiser == [400]
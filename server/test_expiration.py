@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Unit tests for core/expiration.py using pytest.
+Run from server/ directory: pytest test_expiration.py
+"""
+
+import asyncio
+import datetime
+
+import pytest
+
+from core import expiration
+from core.expiration import (
+    _expiry_ttl,
+    _parse_not_after,
+    get_cert_expiration_data,
+    get_cert_expiration_many,
+    get_cert_expiration_no_raise,
+)
+from core.schema import CertExpirationData, CertExpirationResult
+
+_UTC = datetime.timezone.utc
+
+
+def _tlv(tag, content):
+    """Encode one DER element, using the long length form past 127 bytes."""
+    if len(content) < 0x80:
+        length = bytes([len(content)])
+    else:
+        size = len(content).to_bytes((len(content).bit_length() + 7) // 8, "big")
+        length = bytes([0x80 | len(size)]) + size
+    return bytes([tag]) + length + content
+
+
+def _cert(not_after, time_tag=0x17, version=True, issuer_size=8):
+    """Build a minimal certificate; only the fields the parser walks are real."""
+    time = _tlv(time_tag, not_after.encode("ascii"))
+    tbs = b"".join(
+        [
+            _tlv(0xA0, _tlv(0x02, b"\x02")) if version else b"",
+            _tlv(0x02, b"\x01"),  # serialNumber
+            _tlv(0x30, _tlv(0x06, b"\x2a")),  # signature
+            _tlv(0x30, b"\x00" * issuer_size),  # issuer
+            _tlv(0x30, time + time),  # validity
+            _tlv(0x30, b""),  # subject
+        ]
+    )
+    return _tlv(0x30, _tlv(0x30, tbs) + _tlv(0x30, b"") + _tlv(0x03, b"\x00"))
+
+
+_DATA = CertExpirationData(
+    expiry_date=datetime.datetime(2030, 1, 1, tzinfo=_UTC),
+    time_remaining_str="1 year",
+    is_expired=False,
+    days_remaining=365,
+)
+
+
+class TestParseNotAfter:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("491231235959Z", datetime.datetime(2049, 12, 31, 23, 59, 59, tzinfo=_UTC)),
+            ("500101000000Z", datetime.datetime(1950, 1, 1, 0, 0, 0, tzinfo=_UTC)),
+        ],
+    )
+    def test_utc_time(self, value, expected):
+        assert _parse_not_after(_cert(value)) == expected
+
+    def test_generalized_time(self):
+        der = _cert("20600615120000Z", time_tag=0x18)
+        assert _parse_not_after(der) == datetime.datetime(2060, 6, 15, 12, tzinfo=_UTC)
+
+    def test_without_version(self):
+        der = _cert("300101000000Z", version=False)
+        assert _parse_not_after(der) == datetime.datetime(2030, 1, 1, tzinfo=_UTC)
+
+    def test_long_form_length(self):
+        der = _cert("300101000000Z", issuer_size=300)
+        assert _parse_not_after(der) == datetime.datetime(2030, 1, 1, tzinfo=_UTC)
+
+    @pytest.mark.parametrize("size", [0, 1, 2, 20, -1])
+    def test_truncated(self, size):
+        der = _cert("300101000000Z")
+        with pytest.raises(ValueError, match="Truncated certificate"):
+            _parse_not_after(der[:size])
+
+    def test_unexpected_time_tag(self):
+        with pytest.raises(ValueError, match="time tag"):
+            _parse_not_after(_cert("300101000000Z", time_tag=0x04))
+
+
+class TestTimeouts:
+    async def test_overall_deadline(self, monkeypatch):
+        async def slow(domain, now=None):
+            await asyncio.sleep(1)
+
+        monkeypatch.setattr(expiration, "get_cert_expiration_data", slow)
+        result = await get_cert_expiration_no_raise("example.com", timeout=0.01)
+        assert result == CertExpirationResult(
+            "example.com", None, "Check timed out after 0.01 seconds"
+        )
+
+    async def test_inner_timeout_keeps_message(self, monkeypatch):
+        async def handshake_timeout(domain, now=None):
+            raise TimeoutError("TLS handshake timed out")
+
+        monkeypatch.setattr(expiration, "get_cert_expiration_data", handshake_timeout)
+        for timeout in (15.0, None):
+            result = await get_cert_expiration_no_raise("example.com", timeout=timeout)
+            assert result.error == "TLS handshake timed out"
+
+    async def test_no_timeout(self, monkeypatch):
+        async def ok(domain, now=None):
+            return _DATA
+
+        monkeypatch.setattr(expiration, "get_cert_expiration_data", ok)
+        result = await get_cert_expiration_no_raise("example.com", timeout=None)
+        assert result == CertExpirationResult("example.com", _DATA, None)
+
+    async def test_connect_timeout(self, monkeypatch):
+        async def resolve(domain):
+            return ["192.0.2.1"]
+
+        async def never_connects(host, port):
+            await asyncio.sleep(1)
+
+        monkeypatch.setattr(expiration, "_resolve", resolve)
+        monkeypatch.setattr(expiration.asyncio, "open_connection", never_connects)
+        monkeypatch.setattr(expiration, "_CONNECT_TIMEOUT_SECONDS", 0.01)
+        monkeypatch.setattr(expiration, "_DNS_CACHE", {"example.com": (0, [])})
+        with pytest.raises(TimeoutError, match="Connection to 192.0.2.1 timed out"):
+            await expiration._open_connection("example.com")
+        assert "example.com" not in expiration._DNS_CACHE
+
+
+class TestCaching:
+    @pytest.fixture(autouse=True)
+    def _empty_caches(self, monkeypatch):
+        monkeypatch.setattr(expiration, "_EXPIRY_CACHE", {})
+        monkeypatch.setattr(expiration, "_INFLIGHT", {})
+        monkeypatch.setattr(expiration, "_EXPIRY_TTL_SECONDS", 3600)
+
+    async def test_single_lookup_then_cached(self, monkeypatch):
+        calls = []
+
+        async def fetch(domain):
+            calls.append(domain)
+            await asyncio.sleep(0.01)
+            return datetime.datetime(2030, 1, 1, tzinfo=_UTC)
+
+        monkeypatch.setattr(expiration, "_get_certificate_expiration_time", fetch)
+        results = await asyncio.gather(
+            *(get_cert_expiration_data("example.com") for _ in range(3))
+        )
+        await get_cert_expiration_data("example.com")
+        assert calls == ["example.com"]
+        assert {r.expiry_date for r in results} == {datetime.datetime(2030, 1, 1, tzinfo=_UTC)}
+
+    @pytest.mark.parametrize(
+        "remaining, expected",
+        [
+            (datetime.timedelta(days=365), 3600),
+            (datetime.timedelta(hours=5), 1800),
+            (datetime.timedelta(minutes=1), 60),
+            (datetime.timedelta(days=-1), 60),
+        ],
+    )
+    def test_expiry_ttl(self, remaining, expected):
+        expiry = datetime.datetime.now(_UTC) + remaining
+        assert _expiry_ttl(expiry) == pytest.approx(expected, abs=1)
+
+
+class TestGetCertExpirationMany:
+    async def test_yields_every_result(self, monkeypatch):
+        async def no_raise(domain, timeout=None, now=None):
+            return CertExpirationResult(domain, None, "failed")
+
+        monkeypatch.setattr(expiration, "get_cert_expiration_no_raise", no_raise)
+        domains = ["a.com", "b.com", "c.com"]
+        results = [r async for r in get_cert_expiration_many(domains, max_concurrency=2)]
+        assert sorted(r.domain for r in results) == domains
+
+    async def test_failed_check_raises(self, monkeypatch):
+        async def no_raise(domain, timeout=None, now=None):
+            if domain == "bad.com":
+                raise RuntimeError("boom")
+            return CertExpirationResult(domain, None, "failed")
+
+        monkeypatch.setattr(expiration, "get_cert_expiration_no_raise", no_raise)
+        with pytest.raises(RuntimeError, match="boom"):
+            async with asyncio.timeout(1):
+                async for _ in get_cert_expiration_many(["a.com", "bad.com"]):
+                    pass